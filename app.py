@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import re
+from pandas.api.types import is_numeric_dtype
 
 ########################################################
 # 1) Load CSV Paths from Streamlit Secrets
@@ -15,23 +17,7 @@ except KeyError as e:
     st.stop()
 
 ########################################################
-# 2) READ THE CSV FILES
-########################################################
-def load_csv_data(file_url, vendor_name):
-    """Safely load CSV data. Return an empty DataFrame if there's an error."""
-    try:
-        return pd.read_csv(file_url)
-    except Exception as e:
-        st.error(f"Could not load {vendor_name} data: {e}")
-        return pd.DataFrame()
-
-fortinet_data = load_csv_data(fortinet_file_path, "Fortinet")
-paloalto_data = load_csv_data(paloalto_file_path, "Palo Alto")
-sonicwall_data = load_csv_data(sonicwall_file_path, "SonicWall")
-sophos_data   = load_csv_data(sophos_file_path, "Sophos")
-
-########################################################
-# 3) VENDOR-SPECIFIC COLUMNS
+# 2) VENDOR-SPECIFIC COLUMNS
 ########################################################
 FORTINET_COLS = [
     "Firewall Throughput (Gbps)",
@@ -54,31 +40,69 @@ SONICWALL_COLS = [
     "IPsec VPN Throughput (Gbps)"
 ]
 
-ALL_COLUMNS = list(set(FORTINET_COLS + PALOALTO_COLS + SONICWALL_COLS))
+# Ordered union (not set) so iteration order and cache keys are stable.
+ALL_COLUMNS = list(dict.fromkeys(FORTINET_COLS + PALOALTO_COLS + SONICWALL_COLS))
 
 ########################################################
-# 4) HELPER: EXTRACT HIGHEST FROM SLASH-STRINGS
+# 3) HELPER: EXTRACT HIGHEST FROM SLASH-STRINGS
 ########################################################
+# Compiled once at import; the non-backtracking form of r"\d+\.?\d*".
+THROUGHPUT_RE = re.compile(r"\d+(?:\.\d+)?")
+
 def extract_max_throughput(value):
     if isinstance(value, str):
-        nums = [float(num) for num in re.findall(r"\d+\.?\d*", value)]
-        return max(nums) if nums else None
+        nums = THROUGHPUT_RE.findall(value)
+        return max(map(float, nums)) if nums else None
     return value
 
 ########################################################
-# 5) PARSE + CONVERT (slash -> numeric)
+# 4) PARSE + CONVERT (slash -> numeric)
 ########################################################
 def parse_and_convert(df, col_list):
-    for c in col_list:
-        if c in df.columns:
-            df[c] = df[c].apply(extract_max_throughput)
-            df[c] = pd.to_numeric(df[c], errors='coerce')
+    """Return a copy with throughput columns converted to numbers."""
+    df = df.copy()
+    cols = [c for c in col_list if c in df.columns]
+    # Columns the CSV reader already parsed as numbers skip the regex.
+    for c in cols:
+        if not is_numeric_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c].apply(extract_max_throughput), errors='coerce')
+    return df
 
-# Parse for all vendors
-parse_and_convert(fortinet_data, FORTINET_COLS)
-parse_and_convert(paloalto_data, PALOALTO_COLS)
-parse_and_convert(sonicwall_data, SONICWALL_COLS)
-parse_and_convert(sophos_data, ALL_COLUMNS)
+########################################################
+# 5) READ + PREPARE THE CSV FILES (cached, loaded on demand)
+########################################################
+def read_csv_fast(file_url):
+    """Read with the multithreaded PyArrow parser, or the C engine without it."""
+    try:
+        return pd.read_csv(file_url, engine="pyarrow")
+    except ImportError:
+        return pd.read_csv(file_url)
+
+@st.cache_data(ttl=3600)
+def load_and_prepare(file_url, col_list):
+    """Read and parse a CSV; return (df, models). Errors propagate uncached."""
+    df = read_csv_fast(file_url)
+    df = parse_and_convert(df, col_list)
+    # A repeated Model would make .loc return a frame; keep the first row.
+    # Categorical Model (int codes) indexed for O(1) row lookup; the
+    # column is kept for display.
+    df = (
+        df.drop_duplicates("Model")
+        .astype({"Model": "category"})
+        .set_index("Model", drop=False)
+    )
+    return df, df.index.dropna().unique().tolist()
+
+def load_csv_data(file_url, vendor_name, col_list):
+    """Safely load CSV data. Return an empty DataFrame and no models on error."""
+    try:
+        return load_and_prepare(file_url, col_list)
+    except Exception as e:
+        st.error(f"Could not load {vendor_name} data: {e}")
+        return pd.DataFrame(), []
+
+# Sophos is always needed; vendor CSVs are loaded on selection below.
+sophos_data, sophos_models = load_csv_data(sophos_file_path, "Sophos", ALL_COLUMNS)
 
 ########################################################
 # 6) UI Title
@@ -113,28 +137,35 @@ vendors = ["Fortinet", "Palo Alto", "SonicWall"]
 selected_vendor = st.selectbox("📌 Select a Vendor", vendors)
 
 if selected_vendor == "Fortinet":
-    use_df = fortinet_data
     use_cols = FORTINET_COLS
+    use_df, use_models = load_csv_data(fortinet_file_path, selected_vendor, use_cols)
 elif selected_vendor == "Palo Alto":
-    use_df = paloalto_data
     use_cols = PALOALTO_COLS
+    use_df, use_models = load_csv_data(paloalto_file_path, selected_vendor, use_cols)
 elif selected_vendor == "SonicWall":
-    use_df = sonicwall_data
     use_cols = SONICWALL_COLS
+    use_df, use_models = load_csv_data(sonicwall_file_path, selected_vendor, use_cols)
 else:
     use_df = pd.DataFrame()
+    use_models = []
     use_cols = []
 
 if use_df.empty:
     st.warning(f"⚠️ No {selected_vendor} data found.")
     st.stop()
 
-selected_model = st.selectbox(f"📌 Select a {selected_vendor} Model", use_df["Model"].dropna().unique())
+if sophos_data.empty:
+    st.warning("⚠️ No Sophos data found.")
+    st.stop()
 
-comp_row = use_df.loc[use_df["Model"] == selected_model].iloc[0]
+selected_model = st.selectbox(f"📌 Select a {selected_vendor} Model", use_models)
+
+comp_row = use_df.loc[selected_model]
+# Vendor throughputs as a vector aligned with use_cols, extracted once.
+comp_vals = comp_row.reindex(use_cols).to_numpy(dtype="float64")
 
 st.write(f"## 📋 Selected {selected_vendor} Model Details")
-st.table(comp_row.to_frame().T)
+st.dataframe(use_df.loc[[selected_model]], hide_index=True, width="stretch")
 
 ########################################################
 # 8) Manual vs Automatic selection of Sophos
@@ -142,75 +173,86 @@ st.table(comp_row.to_frame().T)
 manual_select = st.checkbox("🔍 Manually select Sophos model?")
 
 ########################################################
-# Helper to build matching score table
+# Helpers to build matching score table and auto-pick
 ########################################################
-def build_matching_table(vendor_row, sophos_row, relevant_cols):
-    dev_dict = {}
-    for c in relevant_cols:
-        v_val = vendor_row.get(c, None)
-        s_val = sophos_row.get(c, None)
-        if pd.notnull(v_val) and v_val != 0 and pd.notnull(s_val):
-            ratio = (s_val / v_val) * 100
-            ratio_str = f"{ratio:.1f}%"
-        else:
-            ratio_str = "N/A"
-        dev_dict[c] = [v_val, s_val, ratio_str]
+def build_matching_table(v_vals, sophos_row, relevant_cols):
+    s_vals = sophos_row.reindex(relevant_cols).to_numpy(dtype="float64")
+    valid = ~np.isnan(v_vals) & (v_vals != 0) & ~np.isnan(s_vals)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = s_vals / v_vals * 100
+    ratio_strs = np.where(valid, np.char.mod("%.1f%%", ratios), "N/A")
 
+    # All cells are text so the mixed table serializes cleanly to Arrow.
     table = pd.DataFrame(
-        dev_dict,
+        [
+            np.where(np.isnan(v_vals), "N/A", v_vals.astype(str)),
+            np.where(np.isnan(s_vals), "N/A", s_vals.astype(str)),
+            ratio_strs
+        ],
         index=[
             f"{selected_model} Value",
             f"{sophos_row['Model']} Value",
             "Matching (%)"
-        ]
+        ],
+        columns=relevant_cols
     )
     return table
 
+def find_best_match(vendor_vals, relevant_cols):
+    """Return the smallest Sophos model that matches on any metric, or None."""
+    # Keep Sophos rows that meet or beat the vendor on at least one metric.
+    # NaN on either side never counts as a match.
+    # Built from sophos_data itself so the mask always lines up with its rows;
+    # both sides are narrowed to float32 just for this comparison.
+    sophos_vals = np.nan_to_num(
+        sophos_data.reindex(columns=relevant_cols).to_numpy(dtype="float32"),
+        nan=-np.inf
+    )
+    vendor_vals = np.where(np.isnan(vendor_vals), np.inf, vendor_vals).astype("float32")
+    mask_any = (sophos_vals >= vendor_vals).any(axis=1)
+
+    # Smallest firewall throughput among the matches, in a single pass.
+    fw_vals = sophos_data["Firewall Throughput (Gbps)"].to_numpy(dtype="float64")
+    candidates = np.where(mask_any & ~np.isnan(fw_vals), fw_vals, np.inf)
+    idx_min = int(np.argmin(candidates))
+
+    if not np.isfinite(candidates[idx_min]):
+        return None
+    return sophos_data.index[idx_min]
+
 ########################################################
 # 9) AUTO LOGIC (if manual_select==False)
 ########################################################
 if not manual_select:
-    mask_any = pd.Series([False]*len(sophos_data), index=sophos_data.index)
-
-    for i, s_row in sophos_data.iterrows():
-        for c in use_cols:
-            if c not in comp_row or c not in s_row:
-                continue
-            f_val = comp_row[c]
-            so_val = s_row[c]
-            if pd.notnull(f_val) and pd.notnull(so_val):
-                if so_val >= f_val:
-                    mask_any[i] = True
-                    break
-
-    filtered_sophos = sophos_data[mask_any]
-
-    if filtered_sophos.empty:
+    # One broadcast over the cached Sophos matrix; cheap enough to redo on
+    # every rerun, so it always reflects the currently cached CSVs.
+    best_model = find_best_match(comp_vals, use_cols)
+
+    if best_model is None:
         st.write("⚠️ Please connect to StarLiNK Presales Consultant..")
         st.stop()
 
-    idx_min = filtered_sophos["Firewall Throughput (Gbps)"].idxmin()
-    chosen_model = filtered_sophos.loc[idx_min]
+    chosen_model = sophos_data.loc[best_model]
 
     st.success(f"🎉 Best matching model found: **{chosen_model['Model']}**! ✅")
     st.write("## ✅ Suggested Sophos Model")
-    st.table(chosen_model.to_frame().T)
+    st.dataframe(sophos_data.loc[[best_model]], hide_index=True, width="stretch")
 
     st.write("## 📊 Matching Score")
-    st.table(build_matching_table(comp_row, chosen_model, use_cols))
+    st.dataframe(build_matching_table(comp_vals, chosen_model, use_cols), width="stretch")
 
 ########################################################
 # 10) MANUAL LOGIC
 ########################################################
 else:
-    chosen_sophos_model = st.selectbox("📌 Choose a Sophos Model", sophos_data["Model"].dropna().unique())
+    chosen_sophos_model = st.selectbox("📌 Choose a Sophos Model", sophos_models)
 
     if chosen_sophos_model:
-        chosen_model = sophos_data.loc[sophos_data["Model"] == chosen_sophos_model].iloc[0]
+        chosen_model = sophos_data.loc[chosen_sophos_model]
         st.write("## ✅ Chosen Sophos Model")
-        st.table(chosen_model.to_frame().T)
+        st.dataframe(sophos_data.loc[[chosen_sophos_model]], hide_index=True, width="stretch")
 
         st.write("## 📊 Matching Score")
-        st.table(build_matching_table(comp_row, chosen_model, use_cols))
+        st.dataframe(build_matching_table(comp_vals, chosen_model, use_cols), width="stretch")
 
 st.markdown("<div class='footer'>Developed by <b>Rajeesh - rajeesh@starlinkme.net</b></div>", unsafe_allow_html=True)